@@ -250,12 +250,9 @@ class TrainableThresholdAttack(Attack):
         """
         if self._threshold is None:
             raise Exception("Attack has not been trained (threshold is None).")
-        scores = self.attack_score(datasets)
-        return np.array(
-            [
-                self.positive_label if s >= self._threshold else self.negative_label
-                for s in scores
-            ]
+        scores = np.asarray(self.attack_score(datasets))
+        return np.where(
+            scores >= self._threshold, self.positive_label, self.negative_label
         )
 
     # Implement this if needed.
@@ -17,6 +17,7 @@ from .set_classifiers import (
     CorrSetFeature,
 )
 
+import numpy as np
 from sklearn.ensemble import RandomForestClassifier
 
 
@@ -27,7 +28,14 @@ class GroundhogAttack(ShadowModellingAttack):
     """
 
     def __init__(
-        self, use_naive=True, use_hist=True, use_corr=True, model=None, label=None
+        self,
+        use_naive=True,
+        use_hist=True,
+        use_corr=True,
+        model=None,
+        label=None,
+        n_jobs=1,
+        feature_dtype=np.float32,
     ):
         """
         Parameters
@@ -43,6 +51,14 @@ class GroundhogAttack(ShadowModellingAttack):
             the default (random forest with 100 learners) is used.
         label: str (default None)
             An optional label to refer to the attack in reports.
+        n_jobs: int (default 1)
+            Number of parallel jobs used to extract features from the
+            (synthetic) datasets, during both training and attack. -1 means
+            using all processors.
+        feature_dtype: numpy dtype (default np.float32)
+            The dtype of the features passed to the classifier. The default
+            random forest works with float32 inputs, so this does not affect
+            its predictions. Use None to keep the features as extracted.
         """
         # Parse the selection of features.
         features = None
@@ -67,6 +83,8 @@ class GroundhogAttack(ShadowModellingAttack):
                 # If a classifier is specified, use it. Otherwise, use a random
                 # forest with 100 trees and default parameters.
                 model or RandomForestClassifier(n_estimators=100),
+                n_jobs=n_jobs,
+                feature_dtype=feature_dtype,
             ),
             label=label or "Groundhog",
         )
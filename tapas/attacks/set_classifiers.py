@@ -8,6 +8,7 @@ if TYPE_CHECKING:
     from sklearn.base import ClassifierMixin
 
 import numpy as np
+from joblib import Parallel, delayed, effective_n_jobs
 
 from abc import ABC, abstractmethod
 
@@ -120,7 +121,12 @@ class FeatureBasedSetClassifier(SetClassifier):
     """
 
     def __init__(
-        self, features: SetFeature, classifier: ClassifierMixin, label: str = None
+        self,
+        features: SetFeature,
+        classifier: ClassifierMixin,
+        label: str = None,
+        n_jobs: int = 1,
+        feature_dtype=None,
     ):
         """
         Parameters
@@ -133,21 +139,56 @@ class FeatureBasedSetClassifier(SetClassifier):
             the features extracted from an input dataset.
         label: str (optional)
             Label to represent this classifier in reports.
+        n_jobs: int (default 1)
+            Number of parallel jobs (joblib) used to extract features from
+            datasets. -1 means using all processors.
+        feature_dtype: numpy dtype (default None)
+            If not None, the features are converted to this dtype before being
+            passed to the classifier. A narrower dtype (e.g., np.float32 or
+            np.float16) reduces the memory used by the features, at the cost
+            of precision. sklearn classifiers upcast inputs as needed.
         """
         self.features = features
         self.classifier = classifier
+        self.n_jobs = n_jobs
+        self.feature_dtype = feature_dtype
         self._label = (
             label or f"Classifier({self.features.label}, {str(self.classifier)})"
         )
 
+    def _extract_features(self, datasets: list[Dataset]) -> np.array:
+        """
+        Extract features from datasets, splitting the datasets in contiguous
+        chunks that are processed in parallel if self.n_jobs != 1.
+
+        The features are returned as a C-contiguous np.array of dtype
+        self.feature_dtype (if specified), which is the layout expected by
+        most numerical backends: classifiers can then use it without copying.
+
+        """
+        num_chunks = min(effective_n_jobs(self.n_jobs), len(datasets))
+        if num_chunks <= 1:
+            features = self.features(datasets)
+        else:
+            chunks = [
+                [datasets[i] for i in indices]
+                for indices in np.array_split(np.arange(len(datasets)), num_chunks)
+            ]
+            features = np.concatenate(
+                Parallel(n_jobs=num_chunks)(
+                    delayed(self.features.extract)(chunk) for chunk in chunks
+                )
+            )
+        return np.ascontiguousarray(features, dtype=self.feature_dtype)
+
     def fit(self, datasets: list[Dataset], labels: list[int]):
-        self.classifier.fit(self.features(datasets), labels)
+        self.classifier.fit(self._extract_features(datasets), labels)
 
     def predict(self, datasets: list[Dataset]):
-        return self.classifier.predict(self.features(datasets))
+        return self.classifier.predict(self._extract_features(datasets))
 
     def predict_proba(self, datasets: list[Dataset]):
-        return self.classifier.predict_proba(self.features(datasets))
+        return self.classifier.predict_proba(self._extract_features(datasets))
 
     @property
     def label(self):
@@ -171,19 +212,21 @@ class NaiveSetFeature(SetFeature):
     """
 
     def extract(self, datasets: list[TabularDataset]) -> np.array:
-        np_data = [dataset.as_numeric for dataset in datasets]
-        return np.stack(
-            [
-                np.concatenate(
-                    [
-                        np.nanmean(data, axis=0),
-                        np.nanmedian(data, axis=0),
-                        np.nanvar(data, axis=0),
-                    ]
-                )
-                for data in np_data
-            ]
-        )
+        num_columns = datasets[0].description.encoded_dim
+        # Preallocate the output, and fill it one dataset at a time.
+        features = np.empty((len(datasets), 3 * num_columns))
+        for i, dataset in enumerate(datasets):
+            data = dataset.as_numeric
+            # The NaN-aware functions are much slower (especially the median),
+            # so only use them if some values are missing.
+            if np.isnan(data).any():
+                mean, median, var = np.nanmean, np.nanmedian, np.nanvar
+            else:
+                mean, median, var = np.mean, np.median, np.var
+            features[i, :num_columns] = mean(data, axis=0)
+            features[i, num_columns : 2 * num_columns] = median(data, axis=0)
+            features[i, 2 * num_columns :] = var(data, axis=0)
+        return features
 
     @property
     def label(self):
@@ -214,8 +257,12 @@ class HistSetFeature(SetFeature):
 
     def extract(self, datasets: list[TabularDataset]) -> np.array:
         dataset_description = datasets[0].description
-        np_data = [dataset.as_numeric for dataset in datasets]
-        features = []
+        # First, compute which features to extract from which columns. Each
+        # entry is (index of the first feature, index of the column in Numpy
+        # form, number of features, bins), where bins is None for categorical
+        # variables.
+        columns = []
+        num_features = 0
         # Index of the current column in Numpy form.
         cidx = 0
         for column_descriptor in dataset_description:
@@ -228,29 +275,17 @@ class HistSetFeature(SetFeature):
                     num_values = column_descriptor["representation"]
                 else:
                     num_values = len(column_descriptor["representation"])
-                # Then, compute the means of the next num_values 1-hot encoded columns.
-                features.append(
-                    np.stack(
-                        [
-                            data[:, cidx : cidx + num_values].mean(axis=0)
-                            for data in np_data
-                        ]
-                    )
-                )
+                # The features are the means of the next num_values 1-hot encoded columns.
+                columns.append((num_features, cidx, num_values, None))
+                num_features += num_values
                 cidx += num_values
 
             elif ctype.startswith("real") or ctype == "interval":
                 # Continuous variables.
                 cmin, cmax = (0, 1) if ctype == "interval" else self.bounds
                 bins = np.linspace(cmin, cmax, self.num_bins + 1)
-                features.append(
-                    np.stack(
-                        [
-                            np.histogram(data[:, cidx], bins)[0] / data.shape[0]
-                            for data in np_data
-                        ]
-                    )
-                )
+                columns.append((num_features, cidx, self.num_bins, bins))
+                num_features += self.num_bins
                 cidx += 1
 
             else:
@@ -258,7 +293,21 @@ class HistSetFeature(SetFeature):
                 # at the moment, and will be ignored.
                 pass
 
-        return np.concatenate(features, axis=1)
+        # Then, preallocate the output and fill it one dataset at a time.
+        features = np.empty((len(datasets), num_features))
+        for i, dataset in enumerate(datasets):
+            data = dataset.as_numeric
+            for fidx, cidx, num_values, bins in columns:
+                if bins is None:
+                    features[i, fidx : fidx + num_values] = data[
+                        :, cidx : cidx + num_values
+                    ].mean(axis=0)
+                else:
+                    features[i, fidx : fidx + num_values] = (
+                        np.histogram(data[:, cidx], bins)[0] / data.shape[0]
+                    )
+
+        return features
 
     @property
     def label(self):
@@ -292,8 +341,12 @@ class CorrSetFeature(SetFeature):
         categorical attributes.
 
         """
-        np_data = [dataset.as_numeric for dataset in datasets]
-        return np.stack([self._corr(dataset.as_numeric) for dataset in datasets])
+        num_columns = datasets[0].description.encoded_dim
+        # Preallocate the output, and fill it one dataset at a time.
+        features = np.empty((len(datasets), num_columns * (num_columns - 1) // 2))
+        for i, dataset in enumerate(datasets):
+            features[i] = self._corr(dataset.as_numeric)
+        return features
 
     @property
     def label(self):
@@ -375,16 +428,14 @@ class RandomTargetedQueryFeature(SetFeature):
 
     def extract(self, datasets):
         """Compute queries on each dataset."""
-        features = []
-        for dataset in datasets:
-            ft = []
-            for columns in self.queries:
-                ft.append(
-                    (dataset.data.values[:, columns] == self.target_values[0, columns])
-                    .prod(axis=1)
-                    .sum(axis=0)
-                )
-            features.append(np.array(ft))
+        # Array of size number x order, where each row is a query.
+        queries = np.array(self.queries, dtype=int).reshape((-1, self.order))
+        features = np.empty((len(datasets), len(queries)), dtype=int)
+        for i, dataset in enumerate(datasets):
+            # Compare each record to the target once, then evaluate all queries
+            # at once: a record matches a query if it matches all its columns.
+            matches = dataset.data.values == self.target_values
+            features[i] = matches[:, queries].all(axis=2).sum(axis=0)
         return features
 
     @property
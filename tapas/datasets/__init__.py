@@ -1,3 +1,3 @@
 from .data_description import DataDescription
 from .dataset import Dataset
-from .dataset import TabularDataset, TabularRecord
+from .dataset import TabularDataset, TabularRecord, TabularDatasetBuilder
@@ -2,6 +2,8 @@
 A represention of the metadata describing a dataset.
 """
 
+from .utils import DatasetEncoder
+
 # TODO: this is only for tabular data?
 
 class DataDescription:
@@ -18,6 +20,7 @@ class DataDescription:
         """
         self.schema = schema
         self._label = label or "Unnamed dataset"
+        self._encoder = None
 
     def view(self, columns):
         """
@@ -77,6 +80,35 @@ class DataDescription:
 
         return nfeatures
 
+    def compile_encoder(self):
+        """
+        Returns an encoder for datasets with this description, which maps a
+        TabularDataset to a np.array where numeric values are kept as is and
+        categorical values are 1-hot encoded (see TabularDataset.as_numeric).
+
+        The encoder is only built once, so the schema should not be modified
+        after calling this method.
+
+        Returns
+        -------
+        tapas.datasets.utils.DatasetEncoder
+
+        """
+        if self._encoder is None:
+            self._encoder = DatasetEncoder(self)
+        return self._encoder
+
+    def __getstate__(self):
+        # The encoder is derived from the schema, so it is not pickled.
+        state = self.__dict__.copy()
+        state.pop("_encoder", None)
+        return state
+
+    def __setstate__(self, state):
+        # This also handles descriptions pickled before the encoder was cached.
+        self.__dict__.update(state)
+        self._encoder = None
+
     @property
     def one_hot_cols(self):
         """
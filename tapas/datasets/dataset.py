@@ -2,10 +2,24 @@
 from abc import ABC, abstractmethod
 import json
 import io
+import os
 
 import numpy as np
 import pandas as pd
 
+## pyarrow is optional: if available, datasets read from csv are cached next to
+## the csv in a binary (parquet) file, which is much faster to load.
+try:
+    import pyarrow
+    import pyarrow.parquet
+    _HAS_PYARROW = True
+    # Errors raised when data cannot be converted to parquet (e.g., object
+    # columns holding values of mixed types).
+    _ARROW_CONVERSION_ERRORS = (pyarrow.ArrowException, TypeError, ValueError)
+except ImportError:
+    _HAS_PYARROW = False
+    _ARROW_CONVERSION_ERRORS = ()
+
 from .data_description import DataDescription
 from .utils import encode_data, index_split, get_dtype
 
@@ -26,28 +40,101 @@ def _parse_csv(fp, schema, label=None):
     TabularDataset
 
     """
-    ## read_csv does not accept datetime in the dtype argument, so we read dates as strings and
-    ## then convert them.
-    dtypes = {
-        i: get_dtype(col["type"], col["representation"]) for i, col in enumerate(schema)
-    }
+    ## read_csv does not accept datetime in the dtype argument, so date columns
+    ## are instead passed to parse_dates and parsed by the C engine while reading.
+    dtypes = {}
+    date_cols = []
+    for col in schema:
+        if col["representation"] == "date" or col["representation"] == "datetime":
+            date_cols.append(col["name"])
+        else:
+            dtypes[col["name"]] = get_dtype(col["type"], col["representation"])
 
     cnames = [col["name"] for col in schema]
-    
-    data = pd.read_csv(fp, header=validate_header(fp, cnames), dtype=dtypes, index_col=None, names=cnames)    
-    
-    ## Convert any date or datetime fields to datetime.
-    for c in [
-        col["name"]
-        for col in schema
-        if col["representation"] == "date" or col["representation"] == "datetime"
-    ]:
-        data[c] = pd.to_datetime(data[c])
+
+    data = pd.read_csv(
+        fp,
+        header=validate_header(fp, cnames),
+        names=cnames,
+        dtype=dtypes,
+        parse_dates=date_cols,
+        index_col=None,
+        engine="c",
+        low_memory=False,
+    )
+
+    ## read_csv silently leaves columns it cannot parse as dates as strings.
+    ## Convert these explicitly, so that invalid dates raise an error.
+    for c in date_cols:
+        if not pd.api.types.is_datetime64_any_dtype(data[c]):
+            data[c] = pd.to_datetime(data[c])
 
     description = DataDescription(schema, label=label)
     return TabularDataset(data, description)
 
 
+def _binary_cache_is_valid(filepath):
+    """
+    Check whether a parquet cache exists for filepath and is at least as recent
+    as both the csv and json files it was created from.
+
+    """
+    cache = f"{filepath}.parquet"
+    if not os.path.exists(cache):
+        return False
+    cache_mtime = os.path.getmtime(cache)
+    return all(
+        cache_mtime >= os.path.getmtime(f"{filepath}.{ext}")
+        for ext in ("csv", "json")
+        if os.path.exists(f"{filepath}.{ext}")
+    )
+
+
+def _to_arrow(data):
+    """
+    Convert data to a pyarrow Table (without the index), to be written to a
+    parquet file. This raises one of _ARROW_CONVERSION_ERRORS if some column
+    cannot be converted.
+
+    """
+    return pyarrow.Table.from_pandas(data, preserve_index=False)
+
+
+def _write_parquet(table, path):
+    """
+    Write a pyarrow Table to a parquet file at path. The file is first written
+    under a temporary name and then renamed, so that readers never see a
+    partial file.
+
+    """
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    try:
+        pyarrow.parquet.write_table(table, tmp_path, compression="zstd")
+        os.replace(tmp_path, path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+
+def _write_binary_cache(data, filepath):
+    """
+    Write data as a parquet file next to the csv. This is best-effort: failing
+    to write the cache (e.g., read-only directory, or data that cannot be
+    converted to parquet) is not an error.
+
+    Returns
+    -------
+    bool
+        Whether the cache was written.
+
+    """
+    try:
+        _write_parquet(_to_arrow(data), f"{filepath}.parquet")
+    except (OSError,) + _ARROW_CONVERSION_ERRORS:
+        return False
+    return True
+
+
 def validate_header(fp, cnames):
     """
     Helper function to toggle 'header' argument in pd.read_csv()
@@ -208,6 +295,9 @@ class TabularDataset(Dataset):
 
     """
 
+    # Random generator used to select records to drop, when these are not given.
+    _rng = np.random.default_rng()
+
     def __init__(self, data, description):
         """
         Parameters
@@ -223,6 +313,102 @@ class TabularDataset(Dataset):
         assert isinstance(description,DataDescription), 'description needs to be of class DataDescription'
         self.description = description
 
+    @property
+    def data(self):
+        """
+        pandas.DataFrame: the records of this dataset. Values derived from the
+        data (e.g., row hashes) are cached, and the cache is cleared whenever
+        this attribute is set. If you modify the DataFrame in place, call
+        _clear_cache() afterwards.
+
+        """
+        return self._data
+
+    @data.setter
+    def data(self, data):
+        self._data = data
+        self._clear_cache()
+
+    def _clear_cache(self):
+        """
+        Clear all cached values derived from self.data.
+
+        """
+        self._row_hashes_cache = None
+        self._soa_cache = None
+        self._numeric_cache = None
+
+    def __getstate__(self):
+        # Cached values are derived from the data, so they are not pickled.
+        state = self.__dict__.copy()
+        for key in ("_row_hashes_cache", "_soa_cache", "_numeric_cache"):
+            state.pop(key, None)
+        return state
+
+    def __setstate__(self, state):
+        # Datasets pickled before data was a property store it as "data".
+        if "data" in state:
+            state["_data"] = state.pop("data")
+        self.__dict__.update(state)
+        self._clear_cache()
+
+    @property
+    def _row_hashes(self):
+        """
+        np.array of uint64: a hash of each row of the data (ignoring the index).
+
+        """
+        if self._row_hashes_cache is None:
+            self._row_hashes_cache = pd.util.hash_pandas_object(
+                self.data, index=False
+            ).to_numpy()
+        return self._row_hashes_cache
+
+    def _as_soa(self):
+        """
+        Structure-of-arrays view of the data: a dictionary mapping the name of
+        each column to its values as a np.array. The arrays are (when possible)
+        views of the data, so they should not be modified. This is cached.
+
+        Returns
+        -------
+        dict[str, np.array]
+
+        """
+        if self._soa_cache is None:
+            self._soa_cache = {
+                name: self.data[name].to_numpy(copy=False) for name in self.data.columns
+            }
+        return self._soa_cache
+
+    def _find_rows(self, row_data):
+        """
+        Find the positions of the rows of this dataset that are equal to the
+        (single) row of row_data, a 1-row pandas.DataFrame.
+
+        Rows are first compared with their hashes, and only rows with the same
+        hash are checked for equality. If the columns or dtypes of row_data
+        differ from this dataset's (in which case equal values can have
+        different hashes), all rows are checked for equality.
+
+        Returns
+        -------
+        np.array
+            Positions of the matching rows, in 0, ..., len(self)-1.
+
+        """
+        if row_data.columns.equals(self.data.columns) and row_data.dtypes.equals(
+            self.data.dtypes
+        ):
+            row_hash = pd.util.hash_pandas_object(row_data, index=False).iloc[0]
+            candidates = np.flatnonzero(self._row_hashes == row_hash)
+            # Rule out hash collisions.
+            is_equal = (
+                self.data.iloc[candidates].to_numpy() == row_data.to_numpy()
+            ).all(axis=1)
+            return candidates[is_equal]
+        return np.flatnonzero((self.data == row_data.iloc[0]).all(axis=1).to_numpy())
+
     @classmethod
     def read_from_string(cls, data, description):
         """
@@ -239,17 +425,26 @@ class TabularDataset(Dataset):
         return _parse_csv(io.StringIO(data), description.schema, description.label)
 
     @classmethod
-    def read(cls, filepath, label = None):
+    def read(cls, filepath, label = None, use_binary_cache = True):
         """
-        Read csv and json files for dataframe and schema respectively.
+        Read csv (or parquet) and json files for dataframe and schema respectively.
+
+        If pyarrow is installed, the parsed csv is cached in a parquet file
+        (``filepath.parquet``), which is used instead of the csv in later
+        calls as long as it is more recent than both the csv and the json.
+        Datasets written with ``format="parquet"`` have no csv, and are always
+        read from the parquet file.
 
         Parameters
         ----------
         filepath: str
-            Full path to the csv and json, excluding the ``.csv`` or ``.json`` extension.
-            Both files should have the same root name.
+            Full path to the data and json files, excluding the extension.
+            All files should have the same root name.
         label: str or None
             An optional string to represent this dataset.
+        use_binary_cache: bool (default True)
+            Whether to read from (and write to) the parquet cache when a csv
+            file is present.
 
         Returns
         -------
@@ -260,7 +455,18 @@ class TabularDataset(Dataset):
         with open(f"{filepath}.json") as f:
             schema = json.load(f)
 
-        return _parse_csv(f"{filepath}.csv", schema, label or filepath)
+        has_csv = os.path.exists(f"{filepath}.csv")
+        use_binary_cache = use_binary_cache and _HAS_PYARROW
+        if (not has_csv and os.path.exists(f"{filepath}.parquet")) or (
+            use_binary_cache and _binary_cache_is_valid(filepath)
+        ):
+            data = pd.read_parquet(f"{filepath}.parquet")
+            return TabularDataset(data, DataDescription(schema, label=label or filepath))
+
+        dataset = _parse_csv(f"{filepath}.csv", schema, label or filepath)
+        if use_binary_cache:
+            _write_binary_cache(dataset.data, filepath)
+        return dataset
 
     def write_to_string(self):
         """
@@ -270,24 +476,68 @@ class TabularDataset(Dataset):
         # Passing None to to_csv returns the csv as a string
         return self.data.to_csv(None, index=False)
 
-    def write(self, filepath):
+    def write(self, filepath, format = "auto", use_binary_cache = True):
         """
-        Write data and description to file
+        Write data and description to file.
+
+        The description is always written as a json file (``filepath.json``).
+        The data is written either as a csv (``filepath.csv``) or, when
+        ``format`` is ``"parquet"``, only as a parquet file
+        (``filepath.parquet``), which is faster to write and read. In both
+        cases, the dataset can be loaded back with ``TabularDataset.read``.
+        Data files previously written at this path in the other format are
+        removed, as they would be out of date.
 
         Parameters
         ----------
         filepath : str
-            Path where the csv and json file are saved.
-
-        """
+            Path where the data and json file are saved (without extension).
+        format : str (default "auto")
+            One of "csv", "parquet" or "auto". "auto" uses parquet if pyarrow
+            is installed and the data can be converted to parquet, and csv
+            otherwise.
+        use_binary_cache: bool (default True)
+            When writing a csv, whether to also write the parquet cache used by
+            ``read`` (only if pyarrow is installed).
+
+        """
+        if format not in ("csv", "parquet", "auto"):
+            raise ValueError(f"Unknown format {format}, expected 'csv', 'parquet' or 'auto'.")
+        if format == "parquet" and not _HAS_PYARROW:
+            raise ImportError("Writing parquet files requires pyarrow.")
+
+        # The data is converted before anything is written, so that nothing is
+        # left half-written if the conversion fails.
+        table = None
+        if format != "csv" and _HAS_PYARROW:
+            try:
+                table = _to_arrow(self.data)
+            except _ARROW_CONVERSION_ERRORS:
+                if format == "parquet":
+                    raise
 
         with open(f"{filepath}.json", "w") as fp:
             json.dump(self.description.schema, fp, indent=4)
 
+        if table is not None:
+            # The parquet file is written after the json, so it is more recent
+            # than both the json and any stale csv left at the same path.
+            _write_parquet(table, f"{filepath}.parquet")
+            if os.path.exists(f"{filepath}.csv"):
+                os.remove(f"{filepath}.csv")
+            return
+
         # TODO: Make sure this writes it exactly as needed
         self.data.to_csv(filepath + ".csv", index=False)
 
-    def sample(self, n_samples=1, frac=None, random_state=None):
+        # The cache is written last, so that it is more recent than the csv.
+        cache_written = (
+            use_binary_cache and _HAS_PYARROW and _write_binary_cache(self.data, filepath)
+        )
+        if not cache_written and os.path.exists(f"{filepath}.parquet"):
+            os.remove(f"{filepath}.parquet")
+
+    def sample(self, n_samples=1, frac=None, random_state=None, replace=False):
         """
         Sample a set of records from a TabularDataset object.
 
@@ -302,17 +552,28 @@ class TabularDataset(Dataset):
         random_state : optional
             Passed to `pandas.DataFrame.sample()`
 
+        replace : bool (default False)
+            Whether to sample records with replacement.
+
         Returns
         -------
         TabularDataset
             A TabularDataset object with a sample of the records of the original object.
+            If all records are sampled without replacement and random_state is None,
+            this is a copy of the dataset, with records in the same order.
 
         """
         if frac:
             n_samples = int(frac * len(self))
 
+        # Sampling all records without replacement only shuffles them, so we
+        # skip the permutation, unless a random_state is given (in which case the
+        # order is expected to be reproducible).
+        if n_samples == len(self) and not replace and random_state is None:
+            return self.copy()
+
         return TabularDataset(
-            data=self.data.sample(n_samples, random_state=random_state),
+            data=self.data.sample(n_samples, replace=replace, random_state=random_state),
             description=self.description,
         )
 
@@ -322,7 +583,7 @@ class TabularDataset(Dataset):
 
         Parameters
         ----------
-        record_ids : list[int]
+        record_ids : list[int], np.array, range or slice
             List of indexes of records to retrieve.
 
         Returns
@@ -331,15 +592,31 @@ class TabularDataset(Dataset):
             A TabularDataset object with the record(s).
 
         """
+        if isinstance(record_ids, slice):
+            return TabularDataset(self.data.iloc[record_ids].copy(), self.description)
 
         # TODO: what if the index is supposed to be a column? an identifier?
         if len(record_ids) == 1:
             return TabularRecord(
                 self.data.iloc[record_ids], self.description, record_ids[0]
             )
+
+        record_ids = np.asarray(record_ids, dtype=np.int64)
+        # Contiguous records are selected with a slice (copied, so that the
+        # records can be modified freely), which avoids fancy indexing.
+        if (
+            len(record_ids) > 1
+            and record_ids[0] >= 0
+            and record_ids[-1] < len(self.data)
+            and (np.diff(record_ids) == 1).all()
+        ):
+            return TabularDataset(
+                self.data.iloc[record_ids[0] : record_ids[-1] + 1].copy(),
+                self.description,
+            )
         return TabularDataset(self.data.iloc[record_ids], self.description)
 
-    def drop_records(self, record_ids=[], n=1, in_place=False):
+    def drop_records(self, record_ids=[], n=1, in_place=False, random_state=None):
         """
         Drop records from the TabularDataset object, if record_ids is empty it will drop a random record.
 
@@ -352,6 +629,9 @@ class TabularDataset(Dataset):
         in_place : bool
             Bool indicating whether or not to change the dataset in-place or return
             a copy. If True, the dataset is changed in-place. The default is False.
+        random_state : optional
+            Seed (or np.random.Generator) used to select the random records to drop.
+            If None, a generator shared by all TabularDatasets is used.
 
         Returns
         -------
@@ -359,18 +639,20 @@ class TabularDataset(Dataset):
             A new TabularDataset object without the record(s) or None if in_place=True.
 
         """
+        # record_ids are positions (as used by .iloc), so rows are dropped with
+        # a boolean mask over positions rather than by index label.
         if len(record_ids) == 0:
-            # drop n random records if none provided
-            record_ids = np.random.choice(self.data.index, size=n).tolist()
-
-        else:
-            # TODO: the indices expected by pandas are the ones used by .loc,
-            # whereas in this file we use mostly .iloc. This needs to be
-            # cleaned in some way. At the moment, we renumber record_ids to
-            # be absolute indices (in 0, ..., len(dataset)-1).
-            record_ids = [self.data.index[i] for i in record_ids]
+            # drop n distinct random records if none provided
+            rng = (
+                type(self)._rng
+                if random_state is None
+                else np.random.default_rng(random_state)
+            )
+            record_ids = rng.choice(len(self.data), size=n, replace=False)
 
-        new_data = self.data.drop(record_ids)
+        mask = np.ones(len(self.data), dtype=bool)
+        mask[np.asarray(record_ids, dtype=np.int64)] = False
+        new_data = self.data.iloc[mask]
 
         if in_place:
             self.data = new_data
@@ -402,7 +684,7 @@ class TabularDataset(Dataset):
                 self.description == records.description
             ), "Both datasets must have the same data description"
 
-            self.data = pd.concat([self.data, records.data])
+            self.data = pd.concat([self.data, records.data], copy=False)
             return
 
         # if not in_place this does the same as the __add__
@@ -433,15 +715,17 @@ class TabularDataset(Dataset):
                 records_in
             ), f"Number of records out must equal number of records in, got {len(records_out)}, {len(records_in)}"
 
+        # pass n as a back-up in case records_out=[]
+        builder = TabularDatasetBuilder(self.description)
+        builder.add(self.drop_records(records_out, n=len(records_in)))
+        builder.add(records_in)
+        new_dataset = builder.finalize()
+
         if in_place:
-            self.drop_records(records_out, n=len(records_in), in_place=in_place)
-            self.add_records(records_in, in_place=in_place)
+            self.data = new_dataset.data
             return
 
-        # pass n as a back-up in case records_out=[]
-        reduced_dataset = self.drop_records(records_out, n=len(records_in))
-
-        return reduced_dataset.add_records(records_in)
+        return new_dataset
 
     def create_subsets(self, n, sample_size, drop_records=False):
         """
@@ -473,10 +757,10 @@ class TabularDataset(Dataset):
         # Returns a list of TabularDataset subsampled from this dataset.
         subsamples = [self.get_records(train_index) for train_index in splits]
 
-        # If required, remove the indices from the dataset.
-        if drop_records:
-            for train_index in splits:
-                self.drop_records(train_index, in_place=True)
+        # If required, remove the indices from the dataset. This is done in one
+        # go, as positions would change after each drop.
+        if drop_records and splits.size > 0:
+            self.drop_records(np.unique(splits), in_place=True)
 
         return subsamples
 
@@ -553,9 +837,13 @@ class TabularDataset(Dataset):
         Returns
         -------
         np.array
+            A read-only array (as it is cached).
 
         """
-        return encode_data(self)
+        if self._numeric_cache is None:
+            self._numeric_cache = encode_data(self)
+            self._numeric_cache.setflags(write=False)
+        return self._numeric_cache
 
     def __add__(self, other):
         """
@@ -577,7 +865,9 @@ class TabularDataset(Dataset):
             self.description == other.description
         ), "Both datasets must have the same data description"
 
-        return TabularDataset(pd.concat([self.data, other.data]), self.description)
+        return TabularDataset(
+            pd.concat([self.data, other.data], copy=False), self.description
+        )
 
     def __iter__(self):
         """
@@ -589,17 +879,33 @@ class TabularDataset(Dataset):
             An iterator object that iterates over individual records, as TabularRecords.
 
         """
-        # iterrows() returns tuples (index, record), and map applies a 1-argument
-        # function to the iterable it is given, hence why we have idx_and_rec
-        # instead of the cleaner (idx, rec).
-        convert_record = lambda idx_and_rec: TabularRecord.from_dataset(
-            TabularDataset(
-                # iterrows() outputs pd.Series rather than .DataFrame, so we convert here:
-                data=idx_and_rec[1].to_frame().T,
-                description=self.description,
+        # Each record is a 1-row slice of the data, which preserves the dtypes
+        # of the columns, identified by its index in this dataset.
+        for i in range(len(self)):
+            yield TabularRecord(
+                self.data.iloc[i : i + 1], self.description, self.data.index[i]
             )
-        )
-        return map(convert_record, self.data.iterrows())
+
+    def batch_iter(self, batch_size):
+        """
+        Returns an iterator over contiguous batches of records in this dataset,
+        which can be used to process records in vectorised batches rather than
+        one-by-one.
+
+        Parameters
+        ----------
+        batch_size : int
+            Number of records in each batch. The last batch may be smaller.
+
+        Returns
+        -------
+        iterator
+            An iterator object that iterates over batches of records, as TabularDatasets.
+            Each batch holds a copy of the records, and can be modified freely.
+
+        """
+        for start in range(0, len(self), batch_size):
+            yield self.get_records(slice(start, start + batch_size))
 
     def __len__(self):
         """
@@ -638,7 +944,7 @@ class TabularDataset(Dataset):
                 f"Only length-1 TabularDatasets can be checked for containment, got length {len(item)})"
             )
 
-        return (self.data == item.data.iloc[0]).all(axis=1).any()
+        return len(self._find_rows(item.data)) > 0
 
     @property
     def label(self):
@@ -701,14 +1007,16 @@ class TabularRecord(TabularDataset):
 
         """
 
-        merged = pd.merge(tabular_dataset.data, self.data, how="outer", indicator=True)
+        positions = tabular_dataset._find_rows(self.data)
 
-        if merged[merged["_merge"] == "both"].shape[0] != 1:
+        if len(positions) == 0:
+            raise AssertionError("Error, this record is not present on the dataset")
+        if len(positions) > 1:
             raise AssertionError(
                 "Error, more than one copy of this record is present on the dataset"
             )
 
-        return merged[merged["_merge"] == "both"].index.values[0]
+        return tabular_dataset.data.index[positions[0]]
 
     def set_id(self, identifier):
         """
@@ -724,8 +1032,12 @@ class TabularRecord(TabularDataset):
         None
 
         """
+        # The data is copied first, as it may be a slice of a parent dataset
+        # (e.g., records produced by iterating over a dataset).
+        data = self.data.copy()
+        data.index = pd.Index([identifier])
         self.id = identifier
-        self.data.index = pd.Index([identifier])
+        self.data = data
 
         return
 
@@ -745,7 +1057,11 @@ class TabularRecord(TabularDataset):
         None
 
         """
-        self.data[column] = value
+        # The data is copied first, as it may be a slice of a parent dataset
+        # (e.g., records produced by iterating over a dataset).
+        data = self.data.copy()
+        data[column] = value
+        self.data = data
 
     def copy(self):
         """
@@ -769,3 +1085,54 @@ class TabularRecord(TabularDataset):
 
         """
         return str(self.id)
+
+
+
+class TabularDatasetBuilder:
+    """
+    Helper to build a TabularDataset from several TabularDatasets with a single
+    concatenation. Adding records one at a time to a dataset copies the whole
+    dataset at each step, whereas this only copies the data once, in finalize().
+
+    """
+
+    def __init__(self, description):
+        """
+        Parameters
+        ----------
+        description: DataDescription
+            The description of the dataset to build.
+        """
+        self.description = description
+        self._frames = []
+
+    def add(self, records):
+        """
+        Add record(s) to the dataset being built.
+
+        Parameters
+        ----------
+        records : TabularDataset
+            A TabularDataset object with the record(s) to add.
+
+        """
+        assert (
+            self.description == records.description
+        ), "Both datasets must have the same data description"
+        self._frames.append(records.data)
+
+    def finalize(self):
+        """
+        Concatenate all the records added so far.
+
+        Returns
+        -------
+        TabularDataset
+            A TabularDataset with all the records added, in order.
+
+        """
+        if not self._frames:
+            return TabularDataset(
+                pd.DataFrame(columns=self.description.columns), self.description
+            )
+        return TabularDataset(pd.concat(self._frames, copy=False), self.description)
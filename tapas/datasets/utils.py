@@ -59,47 +59,98 @@ def encode_data(dataset, infer_ranges=False): # TODO: Write tests
             Encoded data (normalised and one-hot encoded).
 
     """
-    n_samples = len(dataset)
-    nfeatures = dataset.description.encoded_dim
-    encoded_data = np.empty((n_samples, nfeatures))
-    cidx = 0
-
-    for i, cdict in enumerate(dataset.description):
-        name = cdict['name']
-        d_type = cdict['type']
-        d_repr = cdict['representation']
-        col_data = dataset.data[name]
-
-        if d_type == 'finite':
-            if isinstance(d_repr, int):
-                col_cats = list(range(d_repr))
+    return dataset.description.compile_encoder()(dataset)
+
+
+class DatasetEncoder:
+    """
+    Encoder of TabularDatasets with a given description as np.ndarrays (see
+    encode_data). The encoding of each column (and the lookup tables of
+    categorical columns) is determined once from the description, rather than
+    every time a dataset is encoded.
+
+    """
+
+    def __init__(self, description):
+        """
+        Parameters
+        ----------
+            description : DataDescription
+                Description of the datasets to encode.
+
+        """
+        self.nfeatures = description.encoded_dim
+        # List of (name, encoding, first column, categories) for each column.
+        self.columns = []
+        cidx = 0
+
+        for cdict in description:
+            name = cdict['name']
+            d_type = cdict['type']
+            d_repr = cdict['representation']
+
+            if d_type == 'finite':
+                if isinstance(d_repr, int):
+                    col_cats = list(range(d_repr))
+                else:
+                    col_cats = d_repr
+                self.columns.append((name, CATEGORICAL, cidx, pd.Index(col_cats)))
+                cidx += len(col_cats)
+
+            elif d_type == 'finite/ordered' and not isinstance(d_repr, int):
+                self.columns.append((name, ORDINAL, cidx, pd.Index(d_repr)))
+                cidx += 1
+
             else:
-                col_cats = d_repr
+                self.columns.append((name, FLOAT, cidx, None))
+                cidx += 1
 
-            col_data_onehot = one_hot(col_data, col_cats)
-            encoded_data[:, cidx : cidx + len(col_cats)] = col_data_onehot
+    def __call__(self, dataset):
+        n_samples = len(dataset)
+        # Initialised with zeros for the one-hot encoded columns.
+        encoded_data = np.zeros((n_samples, self.nfeatures))
+        columns = dataset._as_soa()
 
-            cidx += len(col_cats)
+        for name, encoding, cidx, categories in self.columns:
+            col_data = columns[name]
 
-        elif d_type == 'finite/ordered' and not isinstance(d_repr, int):
-            def f(val):
-                return d_repr.index(val)
-            col_data_numeric = col_data.apply(f)
-            encoded_data[:, cidx] = col_data_numeric
+            if encoding == CATEGORICAL:
+                encoded_data[
+                    np.arange(n_samples), cidx + category_index(col_data, categories)
+                ] = 1
 
-            cidx += 1
+            elif encoding == ORDINAL:
+                encoded_data[:, cidx] = category_index(col_data, categories)
 
-        else:
-            encoded_data[:, cidx] = col_data
-            cidx += 1
+            else:
+                encoded_data[:, cidx] = col_data
+
+        return encoded_data
 
-    return encoded_data
+
+def category_index(col_data, categories):
+    """
+    Position of each value of col_data in the list of categories, computed
+    with a single (hash-based) lookup for the whole column. Passing categories
+    as a pd.Index allows the lookup table to be reused across calls.
+
+    Raises a ValueError if some values are not in categories.
+
+    """
+    if not isinstance(categories, pd.Index):
+        categories = pd.Index(categories)
+    cidx = categories.get_indexer(col_data)
+    if (cidx < 0).any():
+        missing = pd.unique(np.asarray(col_data)[cidx < 0])
+        raise ValueError(
+            f"Values {list(missing)} are not in categories {list(categories)}"
+        )
+    return cidx
 
 
 def one_hot(col_data, categories):
     col_data_onehot = np.zeros((len(col_data), len(categories)))
-    cidx = [categories.index(c) for c in col_data]
-    col_data_onehot[np.arange(len(col_data)), cidx] = 1
+    col_data_onehot[np.arange(len(col_data)), category_index(col_data, categories)] = 1
 
     return col_data_onehot
 
@@ -114,21 +165,20 @@ def index_split(max_index, split_size, num_splits):
         split_size (int): Number of indices per split
         num_splits (int): Number of splits to make
     Returns:
-        indices (List[np.ndarray]): List of numpy arrays of indices.
+        indices (np.ndarray): Array of size num_splits x split_size, where each
+            row is a split.
     """
     splits_per_repeat = max_index // split_size
-    num_repeats = num_splits // splits_per_repeat
-    remainder_splits = num_splits % splits_per_repeat
-    indices = []
-    for _ in range(num_repeats):
-        index_array = np.arange(max_index)
-        np.random.shuffle(index_array)
-        indices += [index_array[split_size*i : split_size*(i+1)] for i in range(splits_per_repeat)]
-    index_array = np.arange(max_index)
-    np.random.shuffle(index_array)
-    indices += [index_array[split_size*i : split_size*(i+1)] for i in range(remainder_splits)]
-
-    return indices
+    num_repeats = -(-num_splits // splits_per_repeat)  # Rounded up.
+    indices = np.empty((num_repeats * splits_per_repeat, split_size), dtype=int)
+    for r in range(num_repeats):
+        # Each repeat is a random permutation of the indices, cut into splits.
+        index_array = np.random.permutation(max_index)[: splits_per_repeat * split_size]
+        indices[r * splits_per_repeat : (r + 1) * splits_per_repeat] = index_array.reshape(
+            (splits_per_repeat, split_size)
+        )
+
+    return indices[:num_splits]
 
 def get_dtype(col_type, col_repr):
     """
@@ -24,6 +24,7 @@ from tapas.attacks import (
     HistSetFeature,
     CorrSetFeature,
     FeatureBasedSetClassifier,
+    RandomTargetedQueryFeature,
     HammingDistance,
     LpDistance,
 )
@@ -209,6 +210,17 @@ class TestSetFeatures(TestCase):
                 data[:, 1].var(axis=0), val[2 * (2 + num_finite) + 1]
             )
 
+        # Check that missing values are ignored.
+        real_data[0][0, 0] = np.nan
+        dataset = TabularDataset(
+            pd.DataFrame(real_data[0], columns=["a", "b", "c"]), data_description
+        )
+        values = feature([dataset])
+        self.assertAlmostEqual(np.nanmean(real_data[0][:, 0]), values[0, 0])
+        self.assertAlmostEqual(
+            np.nanmedian(real_data[0][:, 0]), values[0, 2 + num_finite]
+        )
+
     def test_histogram(self):
         """Test that the histogram features work properly."""
         data_description = DataDescription(
@@ -284,6 +296,68 @@ class TestSetFeatures(TestCase):
             ),
         )
 
+    def test_targeted_queries(self):
+        """Test that the targeted queries count records matching the target."""
+        data_description = DataDescription(
+            [
+                {"name": "a", "type": "finite", "representation": ["x", "y"]},
+                {"name": "b", "type": "finite", "representation": ["x", "y"]},
+            ]
+        )
+        data = pd.DataFrame(
+            [("x", "x"), ("x", "y"), ("y", "y"), ("x", "x")], columns=["a", "b"]
+        )
+        dataset = TabularDataset(data, data_description)
+        target = dataset.get_records([0])
+        # Order 2: the only query counts records equal to the target.
+        feature = RandomTargetedQueryFeature(target, order=2, number=1)
+        self.assertEqual(
+            feature([dataset, dataset.get_records([1, 2])]).tolist(), [[2], [0]]
+        )
+        # Order 1: each query counts records matching the target on one column.
+        feature = RandomTargetedQueryFeature(target, order=1, number=2)
+        expected = [3 if columns == (0,) else 2 for columns in feature.queries]
+        self.assertEqual(feature([dataset]).tolist(), [expected])
+
+    def test_parallel_extraction(self):
+        """Test that extracting features in parallel gives the same result."""
+        data_description = DataDescription(
+            [
+                {"name": "a", "type": "real", "representation": "number"},
+                {"name": "b", "type": "finite", "representation": ["x", "y", "z"]},
+            ]
+        )
+        num_records = 50
+        datasets = [
+            TabularDataset(
+                pd.DataFrame(
+                    zip(
+                        np.random.random(size=(num_records,)),
+                        np.random.choice(["x", "y", "z"], size=(num_records,)),
+                    ),
+                    columns=["a", "b"],
+                ),
+                data_description,
+            )
+            for _ in range(7)
+        ]
+        feature = NaiveSetFeature() + HistSetFeature() + CorrSetFeature()
+        serial = FeatureBasedSetClassifier(feature, LogisticRegression())
+        parallel = FeatureBasedSetClassifier(feature, LogisticRegression(), n_jobs=2)
+        np.testing.assert_array_equal(
+            serial._extract_features(datasets), parallel._extract_features(datasets)
+        )
+        # The features can be converted to a narrower dtype.
+        narrow = FeatureBasedSetClassifier(
+            feature, LogisticRegression(), feature_dtype=np.float16
+        )
+        features = narrow._extract_features(datasets)
+        self.assertEqual(features.dtype, np.float16)
+        self.assertTrue(features.flags["C_CONTIGUOUS"])
+        np.testing.assert_allclose(
+            features, serial._extract_features(datasets), atol=1e-2
+        )
+
 
 ## Test for the Groundhog attack.
 
@@ -1,13 +1,19 @@
 """A  simple test for the dataset class"""
 import copy
+import os
 from random import randint
 import json
+import pickle
+import tempfile
+import numpy as np
+import pandas as pd
 from unittest import TestCase
 from warnings import filterwarnings
 
 filterwarnings("ignore")
 
-from tapas.datasets import TabularDataset, TabularRecord
+from tapas.datasets import TabularDataset, TabularRecord, TabularDatasetBuilder
+from tapas.datasets import dataset as dataset_module
 from tapas.datasets.data_description import DataDescription
 from tapas.datasets.canary import create_canary
 
@@ -23,6 +29,38 @@ class TestDescription(TestCase):
         description_2 = DataDescription(copy.deepcopy(dummy_descr))
         self.assertEqual(description_1, description_2)
 
+    def test_compile_encoder(self):
+        description = DataDescription(
+            [
+                {"name": "a", "type": "finite", "representation": ["A", "B", "C"]},
+                {"name": "b", "type": "finite/ordered", "representation": ["X", "Y"]},
+                {"name": "c", "type": "real", "representation": "number"},
+            ]
+        )
+        encoder = description.compile_encoder()
+        self.assertIs(description.compile_encoder(), encoder)
+        dataset = TabularDataset([("B", "Y", 0.5), ("C", "X", 2.0)], description)
+        np.testing.assert_array_equal(
+            encoder(dataset), [[0, 1, 0, 1, 0.5], [0, 0, 1, 0, 2.0]]
+        )
+        # Values outside of the categories cannot be encoded.
+        with self.assertRaises(ValueError):
+            encoder(TabularDataset([("D", "Y", 0.5)], description))
+
+        # The encoder is not pickled, and descriptions pickled before it was
+        # cached can still compile one.
+        loaded = pickle.loads(pickle.dumps(description))
+        self.assertNotIn("_encoder", description.__getstate__())
+        np.testing.assert_array_equal(
+            loaded.compile_encoder()(dataset), encoder(dataset)
+        )
+        legacy = DataDescription.__new__(DataDescription)
+        legacy.__dict__ = {"schema": description.schema, "_label": "legacy"}
+        loaded = pickle.loads(pickle.dumps(legacy))
+        np.testing.assert_array_equal(
+            loaded.compile_encoder()(dataset), encoder(dataset)
+        )
+
 
 class TestTabularDataset(TestCase):
     def setUp(self):
@@ -39,6 +77,134 @@ class TestTabularDataset(TestCase):
 
         self.assertEqual(self.dataset.description.schema, description)
 
+    def test_read_from_string_dtypes(self):
+        description = DataDescription(
+            [
+                {"name": "a", "type": "finite", "representation": ["A", "B"]},
+                {"name": "b", "type": "countable", "representation": "integer"},
+                {"name": "c", "type": "real", "representation": "number"},
+                {"name": "d", "type": "countable/ordered", "representation": "date"},
+            ]
+        )
+        dataset = TabularDataset.read_from_string(
+            "A,1,0.5,2020-01-31\nB,2,1.5,2021-06-01\n", description
+        )
+        self.assertEqual(dataset.data["a"].dtype, object)
+        self.assertTrue(np.issubdtype(dataset.data["b"].dtype, np.integer))
+        self.assertTrue(np.issubdtype(dataset.data["c"].dtype, np.floating))
+        self.assertTrue(np.issubdtype(dataset.data["d"].dtype, np.datetime64))
+
+        # Dates that cannot be parsed raise an error.
+        with self.assertRaises(ValueError):
+            TabularDataset.read_from_string("A,1,0.5,not a date\n", description)
+
+    def test_pickle(self):
+        # Cached values are not pickled, and are recomputed after loading.
+        self.dataset.as_numeric
+        loaded = pickle.loads(pickle.dumps(self.dataset))
+        self.assertIsNone(loaded._numeric_cache)
+        self.assertTrue(loaded.data.equals(self.dataset.data))
+        np.testing.assert_array_equal(loaded.as_numeric, self.dataset.as_numeric)
+
+        # Datasets pickled before data was a property can still be loaded.
+        legacy = TabularDataset.__new__(TabularDataset)
+        legacy.__dict__ = {
+            "data": self.dataset.data,
+            "description": self.dataset.description,
+        }
+        loaded = pickle.loads(pickle.dumps(legacy))
+        self.assertTrue(loaded.data.equals(self.dataset.data))
+        self.assertIn(self.dataset.get_records([3]), loaded)
+
+    def test_read_binary_cache(self):
+        if not dataset_module._HAS_PYARROW:
+            self.skipTest("pyarrow is not installed.")
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            filepath = os.path.join(tmpdir, "texas")
+            self.dataset.write(filepath, format="csv")
+            self.assertTrue(os.path.exists(f"{filepath}.parquet"))
+
+            from_cache = TabularDataset.read(filepath)
+            from_csv = TabularDataset.read(filepath, use_binary_cache=False)
+            self.assertTrue(from_cache.data.equals(from_csv.data))
+            self.assertEqual(from_cache.description, from_csv.description)
+
+    def test_write_mixed_types(self):
+        # pyarrow cannot convert object columns holding values of mixed types.
+        description = DataDescription(
+            [{"name": "a", "type": "countable", "representation": "string"}]
+        )
+        dataset = TabularDataset(pd.DataFrame({"a": ["1", 2, "x"]}), description)
+        with tempfile.TemporaryDirectory() as tmpdir:
+            filepath = os.path.join(tmpdir, "mixed")
+            # The csv is written even if the cache cannot be.
+            dataset.write(filepath, format="csv")
+            self.assertFalse(os.path.exists(f"{filepath}.parquet"))
+            loaded = TabularDataset.read(filepath)
+            self.assertEqual(list(loaded.data["a"]), ["1", "2", "x"])
+
+        if not dataset_module._HAS_PYARROW:
+            return
+        with tempfile.TemporaryDirectory() as tmpdir:
+            filepath = os.path.join(tmpdir, "mixed")
+            # By default, data that cannot be written as parquet is written as
+            # csv, and files previously written at this path are replaced.
+            self.dataset.get_records(range(5)).write(filepath, format="parquet")
+            dataset.write(filepath)
+            self.assertFalse(os.path.exists(f"{filepath}.parquet"))
+            loaded = TabularDataset.read(filepath)
+            self.assertEqual(list(loaded.data["a"]), ["1", "2", "x"])
+            self.assertEqual(loaded.description, description)
+
+            # An explicit parquet format raises an error, before any file is written.
+            os.remove(f"{filepath}.json")
+            with self.assertRaises(TypeError):
+                dataset.write(filepath, format="parquet")
+            self.assertFalse(os.path.exists(f"{filepath}.json"))
+
+    def test_write_parquet(self):
+        if not dataset_module._HAS_PYARROW:
+            self.skipTest("pyarrow is not installed.")
+
+        subset = self.dataset.sample(100, random_state=0)
+        with tempfile.TemporaryDirectory() as tmpdir:
+            filepath = os.path.join(tmpdir, "texas")
+            subset.write(filepath)
+            self.assertTrue(os.path.exists(f"{filepath}.json"))
+            self.assertTrue(os.path.exists(f"{filepath}.parquet"))
+            self.assertFalse(os.path.exists(f"{filepath}.csv"))
+
+            loaded = TabularDataset.read(filepath)
+            self.assertTrue(loaded.data.equals(subset.data.reset_index(drop=True)))
+            self.assertEqual(loaded.description, subset.description)
+
+        with self.assertRaises(ValueError):
+            subset.write(filepath, format="xlsx")
+
+    def test_write_overwrites_other_format(self):
+        if not dataset_module._HAS_PYARROW:
+            self.skipTest("pyarrow is not installed.")
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            filepath = os.path.join(tmpdir, "texas")
+            # A csv written earlier is removed when writing parquet.
+            self.dataset.get_records(range(7)).write(filepath, format="csv")
+            self.dataset.get_records(range(5)).write(filepath, format="parquet")
+            self.assertFalse(os.path.exists(f"{filepath}.csv"))
+            self.assertEqual(len(TabularDataset.read(filepath)), 5)
+            self.assertEqual(
+                len(TabularDataset.read(filepath, use_binary_cache=False)), 5
+            )
+
+            # A parquet file written earlier is removed when writing a csv
+            # without a cache.
+            self.dataset.get_records(range(3)).write(
+                filepath, format="csv", use_binary_cache=False
+            )
+            self.assertFalse(os.path.exists(f"{filepath}.parquet"))
+            self.assertEqual(len(TabularDataset.read(filepath)), 3)
+
     def test_sample(self):
         # returns a subset of the samples
         data_sample = self.dataset.sample(500)
@@ -46,6 +212,15 @@ class TestTabularDataset(TestCase):
         self.assertEqual(data_sample.description, self.dataset.description)
         self.assertEqual(len(data_sample), 500)
 
+        # sampling all records returns a copy of the dataset
+        data_sample = self.dataset.sample(frac=1.0)
+        self.assertTrue(data_sample.data.equals(self.dataset.data))
+        self.assertIsNot(data_sample.data, self.dataset.data)
+        data_sample = self.dataset.sample(len(self.dataset), random_state=0)
+        self.assertEqual(len(data_sample), len(self.dataset))
+        data_sample = self.dataset.sample(len(self.dataset), replace=True)
+        self.assertEqual(len(data_sample), len(self.dataset))
+
     def test_add(self):
         # returns a subset of the samples
         data_sample1 = self.dataset.sample(500)
@@ -71,6 +246,22 @@ class TestTabularDataset(TestCase):
 
         self.assertEqual(len(records), len(index))
 
+        # contiguous records
+        for index in [range(10, 20), list(range(10, 20)), slice(10, 20)]:
+            records = self.dataset.get_records(index)
+            self.assertTrue(records.data.equals(self.dataset.data.iloc[10:20]))
+
+        # records are independent of the dataset
+        original = self.dataset.data.copy()
+        records = self.dataset.get_records(range(0, 10))
+        records.data.iloc[3, 0] = self.dataset.data.iloc[4, 0]
+        self.assertTrue(self.dataset.data.equals(original))
+
+        # records out of range raise an error, even if contiguous
+        n = len(self.dataset)
+        with self.assertRaises(IndexError):
+            self.dataset.get_records([n - 2, n - 1, n])
+
     def test_drop_records(self):
         # returns a subset of the records
         index = [10, 20, 50, 100]
@@ -92,6 +283,19 @@ class TestTabularDataset(TestCase):
         new_dataset = self.dataset.drop_records(n=4)
         self.assertEqual(len(new_dataset), len(self.dataset) - 4)
 
+        # random records are distinct, and reproducible given a seed
+        new_dataset = self.dataset.drop_records(n=len(self.dataset) - 1)
+        self.assertEqual(len(new_dataset), 1)
+        dataset_1 = self.dataset.drop_records(n=10, random_state=0)
+        dataset_2 = self.dataset.drop_records(n=10, random_state=0)
+        self.assertTrue(dataset_1.data.index.equals(dataset_2.data.index))
+
+        # record_ids are positions, even if the index has duplicate labels
+        doubled = self.dataset.get_records([0, 1]) + self.dataset.get_records([0, 1])
+        new_dataset = doubled.drop_records([0])
+        self.assertEqual(len(new_dataset), 3)
+        self.assertEqual(list(new_dataset.data.index), [1, 0, 1])
+
         # test in-place flag
         new_dataset = copy.copy(self.dataset)  # Don't want to modify self.dataset
         new_dataset.drop_records(index, in_place=True)
@@ -130,6 +334,18 @@ class TestTabularDataset(TestCase):
         self.assertEqual(len(rI), 10)
         self.assertEqual(100, rI[0].data.shape[0])
 
+        # Records in the subsets can be removed from the dataset.
+        new_dataset = self.dataset.copy()
+        subsets = new_dataset.create_subsets(3, 100, drop_records=True)
+        self.assertEqual(len(new_dataset), len(self.dataset) - 300)
+        for subset in subsets:
+            self.assertFalse(subset.data.index.isin(new_dataset.data.index).any())
+
+        # Creating no subsets does not drop any record.
+        new_dataset = self.dataset.copy()
+        self.assertEqual(new_dataset.create_subsets(0, 10, drop_records=True), [])
+        self.assertEqual(len(new_dataset), len(self.dataset))
+
     def test_replace(self):
         # returns a subset of the records
         index = [200, 300]
@@ -170,6 +386,17 @@ class TestTabularDataset(TestCase):
         for idx in index:
             self.assertIn(self.dataset.get_records([idx]), new_dataset)
 
+    def test_builder(self):
+        builder = TabularDatasetBuilder(self.dataset.description)
+        self.assertEqual(len(builder.finalize()), 0)
+
+        index = [3, 5, 7]
+        for idx in index:
+            builder.add(self.dataset.get_records([idx]))
+        built = builder.finalize()
+        self.assertEqual(built.description, self.dataset.description)
+        self.assertTrue(built.data.equals(self.dataset.get_records(index).data))
+
     def test_empty(self):
         empty_dataset = self.dataset.empty()
         self.assertEqual(len(empty_dataset), 0)
@@ -184,6 +411,21 @@ class TestTabularDataset(TestCase):
             record_count += 1
         self.assertEqual(record_count, len(self.dataset))
 
+    def test_batch_iter(self):
+        batches = list(self.dataset.batch_iter(100))
+        self.assertEqual(len(batches), 10)
+        self.assertEqual(len(batches[-1]), len(self.dataset) - 900)
+        for batch in batches:
+            self.assertEqual(batch.description, self.dataset.description)
+        self.assertEqual(sum(len(batch) for batch in batches), len(self.dataset))
+
+        # Modifying a batch leaves the dataset unchanged.
+        original = self.dataset.data.copy()
+        encoded = self.dataset.as_numeric
+        batches[0].data.iloc[0, 0] = self.dataset.data.iloc[3, 0]
+        self.assertTrue(self.dataset.data.equals(original))
+        self.assertTrue((self.dataset.as_numeric == encoded).all())
+
     def test_contains(self):
         self.assertNotIn(self.row_out, self.dataset)
         self.assertIn(self.row_in, self.dataset)
@@ -193,6 +435,28 @@ class TestTabularDataset(TestCase):
         for row in rows:
             self.assertIn(row, self.dataset)
 
+    def test_contains_after_modification(self):
+        record = self.dataset.get_records([10])
+        new_dataset = self.dataset.drop_records([10])
+        self.assertNotIn(record, new_dataset)
+        # The cached row hashes must be updated when records are added.
+        new_dataset.add_records(record, in_place=True)
+        self.assertIn(record, new_dataset)
+        # Records with different dtypes are compared by value.
+        record_as_objects = TabularDataset(
+            record.data.astype(object), record.description
+        )
+        self.assertIn(record_as_objects, new_dataset)
+
+    def test_as_numeric_cache(self):
+        encoded = self.dataset.as_numeric
+        self.assertIs(self.dataset.as_numeric, encoded)
+        # The encoding is recomputed when the data is modified.
+        new_dataset = copy.copy(self.dataset)
+        new_dataset.drop_records([0, 1], in_place=True)
+        self.assertEqual(new_dataset.as_numeric.shape[0], encoded.shape[0] - 2)
+        self.assertTrue((new_dataset.as_numeric == encoded[2:]).all())
+
     def test_canary(self):
         new_dataset, canary = create_canary(self.dataset)
         self.assertEqual(new_dataset.description, canary.description)
@@ -1,4 +1,7 @@
 import unittest
+import warnings
+
+import pandas as pd
 
 from tapas.datasets import TabularRecord
 from tapas.datasets import TabularDataset
@@ -21,6 +24,14 @@ class TestTabularRecord(unittest.TestCase):
 
         self.assertEqual(value, 10)
 
+        # The id is the index of the record in the dataset, not its position.
+        subset = self.tabulardataset.get_records(list(range(5, 20)))
+        self.assertEqual(self.record.get_id(subset), 10)
+
+        # Records that are not in the dataset have no id.
+        with self.assertRaises(AssertionError):
+            self.record.get_id(self.tabulardataset.drop_records([self.id]))
+
     def test_set_id(self):
         new_id = '100'
         self.record.set_id(new_id)
@@ -28,6 +39,22 @@ class TestTabularRecord(unittest.TestCase):
         self.assertEqual(self.record.id, new_id)
         self.assertEqual(self.record.data.index.values, new_id)
 
+    def test_set_value_on_iterated_record(self):
+        column = self.tabulardataset.data.columns[0]
+        original = self.tabulardataset.data.copy()
+        record = next(iter(self.tabulardataset))
+        new_value = original[column].iloc[1]
+
+        with warnings.catch_warnings():
+            warnings.simplefilter("error", pd.errors.SettingWithCopyWarning)
+            record.set_value(column, new_value)
+            record.set_id(-1)
+
+        self.assertEqual(record.data[column].iloc[0], new_value)
+        self.assertEqual(record.id, -1)
+        # The parent dataset is left unchanged.
+        self.assertTrue(self.tabulardataset.data.equals(original))
+
 
 if __name__ == '__main__':
     unittest.main()
@@ -23,6 +23,7 @@ from .attacker_knowledge import (
     LabelInferenceThreatModel,
 )
 from ..report import AIAttackSummary, BinaryAIAttackSummary
+from ..datasets import TabularDatasetBuilder
 
 import numpy as np
 
@@ -106,10 +107,12 @@ class AIALabeller(AttackerKnowledgeWithLabel):
             ds = ds.drop_records(
                 np.random.choice(len(ds), size=len(self.target_records), replace=False)
             )
-            # Add records one by one, with corresponding label.
+            # Add records with corresponding label, all at once.
+            builder = TabularDatasetBuilder(ds.description)
+            builder.add(ds)
             for r, v, mod_r in zip(self.target_records, labels, modified_records):
-                ds.add_records(mod_r[v], in_place=True)
-            mod_datasets.append(ds)
+                builder.add(mod_r[v])
+            mod_datasets.append(builder.finalize())
         # Convert labels to a 1-dimensional list if only one target record is given.
         if len(self.target_records) == 1:
             all_labels = [l[0] for l in all_labels]
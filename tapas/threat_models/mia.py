@@ -22,6 +22,7 @@ from .attacker_knowledge import (
     LabelInferenceThreatModel,
 )
 from ..report import MIAttackSummary
+from ..datasets import TabularDatasetBuilder
 
 import numpy as np
 import warnings
@@ -122,15 +123,24 @@ class MIALabeller(AttackerKnowledgeWithLabel):
                         in_place=True,
                         n=0,  # Same as above.
                     )
-            # Add the target records.
+            # Add the target records. The records are concatenated to the
+            # dataset(s) all at once, rather than one at a time.
+            builder = TabularDatasetBuilder(dataset.description)
+            builder.add(dataset)
+            if self.generate_pairs:
+                builder2 = TabularDatasetBuilder(dataset2.description)
+                builder2.add(dataset2)
             for record, label in zip(self.target_records, labels):
                 # If the label is 1, modify dataset.
                 if label:
-                    dataset.add_records(record, in_place=True)
+                    builder.add(record)
                 # If generating pairs and the label is 0, the label is 1 for
                 # the other dataset in the pair. Modify dataset2
                 elif self.generate_pairs:
-                    dataset2.add_records(record, in_place=True)
+                    builder2.add(record)
+            dataset = builder.finalize()
+            if self.generate_pairs:
+                dataset2 = builder2.finalize()
             # Labels need to be converted, either as lists or int/float (if only one).
             _convert = list if len(self.target_records) > 1 else lambda x: x[0]
             mod_datasets.append(dataset)